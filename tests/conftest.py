@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# bot.py reads its config from the environment at import time
+os.environ.setdefault("BOT_TOKEN", "0:test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,89 @@
+"""/search latency: flat extraction and the search cache vs the old full-resolve path.
+
+yt_dlp.YoutubeDL.extract_info is replaced by a stand-in that returns the
+fixtures in tests/fixtures and sleeps for their per-request latency. A flat
+search costs one results page; the old path also resolved every result.
+Latencies are scaled by BENCH_LATENCY_SCALE to keep the run short. Run with
+-s to see the p50/p95 table.
+"""
+import asyncio
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+import yt_dlp
+
+import bot
+
+FIXTURES = Path(__file__).parent / "fixtures"
+FLAT = json.loads((FIXTURES / "ytsearch_flat.json").read_text())
+FULL = json.loads((FIXTURES / "ytsearch_full.json").read_text())
+SCALE = float(os.getenv("BENCH_LATENCY_SCALE", "0.05"))
+QUERIES = [f"never gonna give you up {i}" for i in range(10)]
+ROUNDS = 2
+
+def fake_extract_info(self, url, download=False, **kwargs):
+    if self.params.get("extract_flat"):
+        time.sleep(FLAT["latency"] * SCALE)
+        return FLAT["info"]
+    time.sleep((FULL["search_latency"] + FULL["latency_per_video"] * len(FULL["info"]["entries"])) * SCALE)
+    return FULL["info"]
+
+def old_search(query: str) -> list:
+    """The pre-flat /search: ytsearch5 with every result fully resolved"""
+    with yt_dlp.YoutubeDL({"quiet": True, "skip_download": True,
+                           "default_search": "ytsearch5", "extract_flat": False}) as ydl:
+        return ydl.extract_info(query, download=False)["entries"]
+
+def percentiles(samples: list) -> tuple:
+    cuts = statistics.quantiles(samples, n=20, method="inclusive")
+    return statistics.median(samples), cuts[18]
+
+async def timed(call) -> float:
+    started = time.perf_counter()
+    await call()
+    return time.perf_counter() - started
+
+@pytest.fixture
+def stand_in_youtube(monkeypatch, tmp_path):
+    monkeypatch.setattr(yt_dlp.YoutubeDL, "extract_info", fake_extract_info)
+    # yt-dlp writes its cookie jar back on close - keep it away from the real cookies file
+    monkeypatch.setattr(bot, "COOKIES_FILE", str(tmp_path / "cookies.txt"))
+    monkeypatch.setattr(bot.store, "available", False)
+    monkeypatch.setattr(bot, "SEARCH_CACHE", bot.LRUCache(bot.SEARCH_CACHE_SIZE, bot.SEARCH_CACHE_TTL))
+
+def test_search_latency(stand_in_youtube):
+    async def run():
+        results = {"old full resolve": [], "search_youtube (flat)": [], "cached_search (warm)": []}
+        for _ in range(ROUNDS):
+            for query in QUERIES:
+                results["old full resolve"].append(await timed(lambda: asyncio.to_thread(old_search, query)))
+                results["search_youtube (flat)"].append(await timed(lambda: bot.search_youtube(query)))
+        for query in QUERIES:
+            await bot.cached_search(query)
+        for _ in range(ROUNDS):
+            for query in QUERIES:
+                results["cached_search (warm)"].append(await timed(lambda: bot.cached_search(query)))
+        return results
+
+    results = asyncio.run(run())
+
+    print()
+    for name, samples in results.items():
+        p50, p95 = percentiles(samples)
+        print(f"{name:24} p50 {p50 * 1000:8.2f} ms   p95 {p95 * 1000:8.2f} ms")
+
+    old_p50, _ = percentiles(results["old full resolve"])
+    _, flat_p95 = percentiles(results["search_youtube (flat)"])
+    _, cached_p95 = percentiles(results["cached_search (warm)"])
+    assert flat_p95 < old_p50
+    assert cached_p95 < flat_p95 / 10
+
+def test_flat_results_carry_what_the_picker_needs(stand_in_youtube):
+    entries = asyncio.run(bot.search_youtube("never gonna give you up"))
+
+    assert len(entries) == len(FLAT["info"]["entries"])
+    assert all(e["id"] and e["title"] and e["url"] for e in entries)
@@ -0,0 +1,83 @@
+"""stream_upload memory: a 400MB upload to a stand-in Bot API must not buffer the file.
+
+The stand-in is a local aiohttp server that accepts sendVideo/sendDocument
+multipart posts, counts the bytes of the file part chunk by chunk and answers
+like the Bot API. Peak Python allocations are measured with tracemalloc
+across the whole upload (client and server). Size via BENCH_UPLOAD_MB.
+"""
+import asyncio
+import os
+import time
+import tracemalloc
+
+import pytest
+from aiohttp import web
+
+import bot
+
+UPLOAD_MB = int(os.getenv("BENCH_UPLOAD_MB", "400"))
+PEAK_LIMIT_MB = 32
+TOKEN = "0:test"
+
+async def start_stand_in_bot_api() -> tuple:
+    """Bot API stand-in on a free local port; returns (runner, base_url, received byte counts)"""
+    received = []
+
+    async def upload(request):
+        reader = await request.multipart()
+        size = 0
+        async for part in reader:
+            if part.filename is None:
+                await part.release()
+                continue
+            while chunk := await part.read_chunk(1 << 16):
+                size += len(chunk)
+        received.append(size)
+        media = {"file_id": "stand-in-file-id", "file_size": size}
+        return web.json_response({"ok": True, "result": {"message_id": len(received), "video": media}})
+
+    app = web.Application(client_max_size=0)
+    app.router.add_post(f"/bot{TOKEN}/sendVideo", upload)
+    app.router.add_post(f"/bot{TOKEN}/sendDocument", upload)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", received
+
+@pytest.fixture
+def video_file(tmp_path):
+    path = tmp_path / "video.mp4"
+    block = os.urandom(1 << 20)
+    with open(path, "wb") as f:
+        for _ in range(UPLOAD_MB):
+            f.write(block)
+    return path
+
+def test_upload_streams_from_disk(video_file, monkeypatch):
+    monkeypatch.setattr(bot, "BOT_TOKEN", TOKEN)
+
+    async def run():
+        runner, base_url, received = await start_stand_in_bot_api()
+        monkeypatch.setattr(bot, "BOT_API_BASE_URL", base_url)
+        try:
+            tracemalloc.start()
+            started = time.perf_counter()
+            sent = await bot.stream_upload("sendVideo", 1, "video", video_file, filename="video.mp4",
+                                           caption="benchmark", supports_streaming=True)
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            await bot.close_http_session()
+            await runner.cleanup()
+        return sent, received, peak, elapsed
+
+    sent, received, peak, elapsed = asyncio.run(run())
+
+    print(f"\n{UPLOAD_MB}MB upload: peak traced memory {peak / 1024 / 1024:.1f}MB, "
+          f"{elapsed:.1f}s ({UPLOAD_MB / elapsed:.0f} MB/s)")
+    assert received == [UPLOAD_MB << 20]
+    assert sent["video"]["file_id"] == "stand-in-file-id"
+    assert peak < PEAK_LIMIT_MB << 20
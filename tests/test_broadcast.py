@@ -0,0 +1,162 @@
+"""BroadcastEngine against a mock Bot API and in-memory collections"""
+import asyncio
+import time
+
+import pytest
+from telegram.error import Forbidden, RetryAfter
+
+import bot
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+    
+    def __aiter__(self):
+        async def gen():
+            for doc in self.docs:
+                yield doc
+        return gen()
+
+class Collection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+    
+    def find(self, query=None, projection=None):
+        docs = self.docs
+        if query and "status" in query:
+            docs = [d for d in docs if d["status"] == query["status"]]
+        if query and "job_id" in query:
+            docs = [d for d in docs if d["job_id"] == query["job_id"] and d["chat_id"] in query["chat_id"]["$in"]]
+        return Cursor(docs)
+    
+    async def aggregate(self, pipeline):
+        job_id = pipeline[0]["$match"]["job_id"]
+        counts = {}
+        for doc in self.docs:
+            if doc["job_id"] == job_id:
+                counts[doc["result"]] = counts.get(doc["result"], 0) + 1
+        return Cursor([{"_id": result, "count": count} for result, count in counts.items()])
+    
+    async def insert_one(self, doc):
+        self.docs.append(doc)
+    
+    async def update_one(self, query, update):
+        pass
+    
+    async def update_many(self, query, update):
+        pass
+
+class StatusMessage:
+    async def edit_text(self, text, **kwargs):
+        pass
+
+class MockBot:
+    """Records when each copy reaches the 'API'; can flood-wait or fail on cue"""
+    ADMIN_CHAT = 1
+    
+    def __init__(self, retry_after_at=None, blocked=(), fail_status=False):
+        self.sent = []
+        self.retry_after_at = retry_after_at
+        self.blocked = set(blocked)
+        self.fail_status = fail_status
+        self.flood_at = None
+    
+    async def send_message(self, chat_id, text=None, **kwargs):
+        if self.fail_status:
+            raise RuntimeError("status message failed")
+        return StatusMessage()
+    
+    async def copy_message(self, chat_id, from_chat_id, message_id):
+        if chat_id in self.blocked:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        if self.retry_after_at is not None and len(self.sent) == self.retry_after_at:
+            self.retry_after_at = None
+            self.flood_at = time.monotonic()
+            raise RetryAfter(1)
+        self.sent.append((time.monotonic(), chat_id))
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(bot, "BROADCAST_RATE", 40)
+    monkeypatch.setattr(bot, "BROADCAST_PROGRESS_INTERVAL", 0.5)
+    monkeypatch.setattr(bot.store, "broadcast_jobs", Collection())
+    monkeypatch.setattr(bot.store, "broadcast_progress", Collection())
+    monkeypatch.setattr(bot, "prune_recipients", lambda chat_ids: asyncio.sleep(0))
+    monkeypatch.setattr(bot, "log_to_group", lambda *args, **kwargs: asyncio.sleep(0))
+    return bot.BroadcastEngine()
+
+def use_recipients(monkeypatch, chat_ids):
+    async def recipients(batch_size=500):
+        for i in range(0, len(chat_ids), batch_size):
+            yield chat_ids[i:i + batch_size]
+    monkeypatch.setattr(bot, "iter_broadcast_recipients", recipients)
+
+async def broadcast(engine, mock, total):
+    job = await engine.start(mock, 7, MockBot.ADMIN_CHAT, [{"chat_id": MockBot.ADMIN_CHAT, "message_id": 5}], total)
+    await engine.tasks[job["_id"]]
+    return job
+
+def busiest_second(times):
+    return max(sum(1 for t in times if start <= t < start + 1) for start in times)
+
+def test_pacing_stays_under_the_rate(engine, monkeypatch):
+    recipients = list(range(100, 200))
+    use_recipients(monkeypatch, recipients)
+    mock = MockBot()
+    
+    job = asyncio.run(broadcast(engine, mock, len(recipients)))
+    
+    assert sorted(chat_id for _, chat_id in mock.sent) == recipients
+    assert job["success"] == len(recipients)
+    # Token bucket: rate per second plus at most one small burst
+    assert busiest_second([t for t, _ in mock.sent]) <= bot.BROADCAST_RATE + 5
+
+def test_retry_after_pauses_every_worker(engine, monkeypatch):
+    recipients = list(range(100, 160))
+    use_recipients(monkeypatch, recipients)
+    mock = MockBot(retry_after_at=20)
+    
+    job = asyncio.run(broadcast(engine, mock, len(recipients)))
+    
+    assert job["success"] == len(recipients)
+    after_flood = [t for t, _ in mock.sent if t > mock.flood_at]
+    assert min(after_flood) - mock.flood_at >= 0.95
+
+def test_each_recipient_is_recorded_and_dead_ones_counted(engine, monkeypatch):
+    recipients = list(range(100, 130))
+    use_recipients(monkeypatch, recipients)
+    mock = MockBot(blocked={105, 110})
+    
+    job = asyncio.run(broadcast(engine, mock, len(recipients)))
+    
+    progress = bot.store.broadcast_progress.docs
+    assert sorted(d["chat_id"] for d in progress) == recipients
+    assert (job["success"], job["failed"], job["pruned"]) == (28, 2, 2)
+
+def test_resume_skips_recorded_recipients(engine, monkeypatch):
+    recipients = list(range(100, 150))
+    use_recipients(monkeypatch, recipients)
+    job = {"_id": "job", "admin_id": 7, "chat_id": MockBot.ADMIN_CHAT, "status": "running", "total": 50,
+           "messages": [{"chat_id": MockBot.ADMIN_CHAT, "message_id": 5}], "success": 0, "failed": 0}
+    bot.store.broadcast_jobs.docs.append(job)
+    bot.store.broadcast_progress.docs.extend(
+        {"job_id": "job", "chat_id": chat_id, "result": "ok"} for chat_id in recipients[:30]
+    )
+    mock = MockBot()
+    
+    async def run():
+        await engine.resume(mock)
+        await engine.tasks["job"]
+    asyncio.run(run())
+    
+    assert sorted(chat_id for _, chat_id in mock.sent) == recipients[30:]
+    assert job["success"] == 50
+
+def test_failed_status_message_releases_the_admin(engine, monkeypatch):
+    use_recipients(monkeypatch, [100])
+    mock = MockBot(fail_status=True)
+    
+    asyncio.run(broadcast(engine, mock, 1))
+    
+    assert engine.running_for(7) is None
+    assert mock.sent == []
@@ -0,0 +1,77 @@
+"""consume_credit against a real mongod - set MONGO_TEST_URI to run"""
+import asyncio
+import os
+import uuid
+
+import pytest
+from pymongo import AsyncMongoClient
+
+import bot
+
+MONGO_TEST_URI = os.getenv("MONGO_TEST_URI")
+
+pytestmark = pytest.mark.skipif(not MONGO_TEST_URI, reason="MONGO_TEST_URI not set")
+
+USER_ID = 424242
+
+async def with_store(test):
+    client = AsyncMongoClient(MONGO_TEST_URI, serverSelectionTimeoutMS=3000)
+    db = client[f"ytbot_test_{uuid.uuid4().hex[:8]}"]
+    bot.store.users = db["users"]
+    bot.store.whitelist = db["whitelist"]
+    bot.store.available = True
+    try:
+        await test()
+    finally:
+        bot.store.available = False
+        await client.drop_database(db.name)
+        await client.close()
+
+def test_new_user_is_created_with_defaults():
+    async def test():
+        remaining = await bot.consume_credit(USER_ID)
+        assert remaining == bot.BASE_CREDITS - 1
+        
+        user = await bot.store.users.find_one({"_id": USER_ID})
+        assert user["credits"] == bot.BASE_CREDITS
+        assert user["daily_usage"] == 1
+        assert user["referrals_made"] == 0
+    
+    asyncio.run(with_store(test))
+
+def test_concurrent_calls_never_exceed_the_limit():
+    async def test():
+        limit = 5
+        await bot.store.users.insert_one({"_id": USER_ID, "credits": limit, "daily_usage": 0,
+                                          "last_usage_date": bot.get_today_str()})
+        
+        results = await asyncio.gather(*(bot.consume_credit(USER_ID) for _ in range(50)))
+        granted = [r for r in results if r is not None]
+        assert len(granted) == limit
+        assert sorted(granted) == list(range(limit))
+        
+        user = await bot.store.users.find_one({"_id": USER_ID})
+        assert user["daily_usage"] == limit
+    
+    asyncio.run(with_store(test))
+
+def test_concurrent_first_calls_for_an_unseen_user():
+    async def test():
+        results = await asyncio.gather(*(bot.consume_credit(USER_ID) for _ in range(40)))
+        assert len([r for r in results if r is not None]) == bot.BASE_CREDITS
+        
+        user = await bot.store.users.find_one({"_id": USER_ID})
+        assert user["daily_usage"] == bot.BASE_CREDITS
+    
+    asyncio.run(with_store(test))
+
+def test_stale_day_resets_usage():
+    async def test():
+        await bot.store.users.insert_one({"_id": USER_ID, "credits": 3, "daily_usage": 3,
+                                          "last_usage_date": "2000-01-01"})
+        
+        assert await bot.consume_credit(USER_ID) == 2
+        user = await bot.store.users.find_one({"_id": USER_ID})
+        assert user["last_usage_date"] == bot.get_today_str()
+    
+    asyncio.run(with_store(test))